@@ -45,19 +45,23 @@ class SimulationLogger:
         log_file_name = f"log_{date_str}.txt"
         return os.path.join(self.log_dir, log_file_name)
 
-    def log(self, message):
+    def log(self, message, timestamp=None):
         """
         写入一条通用日志信息。
         如果日期发生变化，会自动切换到新的日志文件。
         
         Args:
             message (str): 日志内容。
+            timestamp (datetime.datetime, optional): 事件发生时间。默认为当前时间，
+                                                     延迟写入时应传入事件时刻。
         """
         new_log_file = self.get_log_file_path()
         if new_log_file != self.current_log_file:
             self.current_log_file = new_log_file
 
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+        if timestamp is None:
+            timestamp = datetime.datetime.now()
+        timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")
         log_entry = f"[{timestamp}] {message}\n"
 
         try:
@@ -66,13 +70,14 @@ class SimulationLogger:
         except Exception as e:
             print(f"Logging error: {e}")
 
-    def log_balise_event(self, train_name, balise_data):
+    def log_balise_event(self, train_name, balise_data, timestamp=None):
         """
         记录列车经过应答器的详细事件。
         
         Args:
             train_name (str): 列车名称。
             balise_data (dict): 应答器数据字典。
+            timestamp (datetime.datetime, optional): 经过时间。默认为当前时间。
         """
         b_name = balise_data.get("name", "Unknown")
         b_id = f"{balise_data.get('nid_c', '0')}-{balise_data.get('nid_bg', '0')}"
@@ -91,4 +96,4 @@ class SimulationLogger:
                f"(Region:{b_id}, GroupPos:{sub_id}). "
                f"Packets: [{packet_str}]")
 
-        self.log(msg)
+        self.log(msg, timestamp)
@@ -463,7 +463,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             return []
 
         try:
-            with open(path, 'r', encoding='utf-8-sig') as f:
+            with open(path, 'r', encoding='utf-8-sig', newline='', buffering=1 << 20) as f:
                 reader = csv.reader(f)
                 header = next(reader, None)
                 data = list(reader)
@@ -476,6 +476,20 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         """打开运行图预览窗口"""
         data = self._load_last_map_data()
         line_length = self.get_max_length()
+
+        # Reuse an open preview: only its schedule artists are refreshed
+        preview = getattr(self, 'map_preview', None)
+        if preview is not None:
+            try:
+                if preview.isVisible():
+                    preview.update_data(data, self.stations, line_length)
+                    preview.raise_()
+                    preview.activateWindow()
+                    return
+            except RuntimeError:
+                # The dialog deletes itself on close
+                pass
+
         self.map_preview = MapPreviewDialog(self, schedule_data=data, stations=self.stations, line_length=line_length)
         self.map_preview.show()
 
@@ -515,6 +529,9 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         if self.about_window:
             self.about_window.close()
 
+        # Write out log entries still waiting for the batched flush
+        self.simulation_widget.flush_logs()
+
         # Accept the close event
         event.accept()
 
@@ -3,12 +3,14 @@
 import copy
 import csv
 import datetime
+import heapq
 import os
 import sys
+from collections import deque
 from typing import Dict, List, Optional
 
 from PySide6.QtCore import QPoint, QPointF, QRect, QSettings, Qt, QTimer, Signal
-from PySide6.QtGui import (QColor, QFont, QPainter, QPen, QPixmap,
+from PySide6.QtGui import (QBrush, QColor, QFont, QPainter, QPen, QPixmap,
                            QPolygonF)
 from PySide6.QtWidgets import QToolTip, QWidget
 
@@ -37,6 +39,9 @@ class SimulationWidget(QWidget):
         self.balises = []
         self.stations = []
         self.trains = []
+        # Partitions of self.trains by driver, kept in sync via _partition_trains
+        self._timetable_trains = []
+        self._manual_trains = []
         self.line_config = {}
         self.track_length = 100.0  # Default 100km
         self.scale = 10.0  # pixels per km
@@ -57,16 +62,35 @@ class SimulationWidget(QWidget):
         self.balise_n_img = QPixmap(os.path.join(asset_dir, "balise_n.png"))
         self.balise_a_img = QPixmap(os.path.join(asset_dir, "balise_a.png"))
         self.train_img = QPixmap(os.path.join(asset_dir, "train.png"))
+        # Train sprite drawn at 6% of its native size, computed once here instead of per paint
+        self._tw = int(self.train_img.width() * 0.06)
+        self._th = int(self.train_img.height() * 0.06)
 
         # Logger
         self.logger = SimulationLogger()
 
+        # Log calls made during ticks are queued and written in batches off the tick path
+        self._log_queue = deque()
+        self.log_timer = QTimer(self)
+        self.log_timer.setSingleShot(True)
+        self.log_timer.setInterval(50)
+        self.log_timer.timeout.connect(self._flush_log_queue)
+
         # Simulation timer
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_simulation)
         self.is_running = False
         self.timer_interval = 16  # approx 60 FPS
 
+        # Repaint coalescing: simulation ticks only mark the view dirty and the
+        # paint timer turns that into at most one update() per frame
+        self._dirty = False
+        self._painted_train_count = -1
+        self.paint_timer = QTimer(self)
+        self.paint_timer.setSingleShot(True)
+        self.paint_timer.setInterval(self.timer_interval)
+        self.paint_timer.timeout.connect(self._flush_repaint)
+
         # Simulation time clock (for timetable based runs)
         self.time_timer = QTimer(self)
         self.time_timer.timeout.connect(self.tick_sim_time)
@@ -81,6 +105,10 @@ class SimulationWidget(QWidget):
         self.schedule_loaded = False
         self.train_templates = []
 
+        # Effective packets per balise index for the current one-second time bucket
+        self._eff_cache = {}
+        self._eff_cache_bucket = None
+
         # Initialize timetable and timers so schedule trains stay independent of run/pause state
         self.load_schedule_entries()
         now_cutoff = datetime.datetime.now().replace(microsecond=0)
@@ -115,6 +143,27 @@ class SimulationWidget(QWidget):
         self.cursor_global_pos = None
         self.last_tooltip_text = ""
 
+        # Paint resources reused across frames
+        self._color_background = QColor(50, 50, 50)
+        self._pen_track = QPen(Qt.white)
+        self._pen_track.setWidth(2)
+        self._pen_balise = QPen(Qt.white)
+        self._pen_balise.setWidth(2)
+        self._pen_text = QPen(Qt.white)
+        self._brush_active = QBrush(QColor(255, 255, 255))
+        self._font_station = QFont()
+        self._font_station.setPointSize(10)
+        self._font_label = QFont()
+        self._font_label.setPointSize(8)
+        # Balise triangle with its top vertex at the origin; translated per balise when drawn
+        self._triangle_h = 18
+        self._triangle_w = 24
+        self._balise_triangle = QPolygonF([
+            QPointF(0, 0),  # Top vertex
+            QPointF(-self._triangle_w / 2, self._triangle_h),  # Bottom Left
+            QPointF(self._triangle_w / 2, self._triangle_h)  # Bottom Right
+        ])
+
     def set_config(
             self,
             balises: List[Dict],
@@ -152,6 +201,7 @@ class SimulationWidget(QWidget):
         # Use a private copy to avoid polluting persisted config with runtime-only trains
         if not preserve_state:
             self.trains = copy.deepcopy(trains)
+            self._partition_trains()
         else:
             # If preserving state, we don't overwrite self.trains with the config list
             # because self.trains currently holds the active/running train objects.
@@ -170,7 +220,7 @@ class SimulationWidget(QWidget):
                 train["is_jumping"] = False
                 train["jump_h"] = 0.0
                 train["jump_v"] = 0.0
-                train["active_restrictions"] = []  # Type: List[Dict: {type, start_km, end_km, speed, priority}]
+                train["active_restrictions"] = []  # Min-heap of (end_km, speed, start_km)
 
         # Determine track length
         if line_config and "total_length" in line_config:
@@ -189,6 +239,7 @@ class SimulationWidget(QWidget):
             self.balise_pass_times.clear()  # Clear pass history on new config
 
         self._process_balise_ids()
+        self._invalidate_effective_packets()
 
         if reset_view:
             self.auto_fit = True
@@ -270,6 +321,11 @@ class SimulationWidget(QWidget):
                 continue
         return None
 
+    def _partition_trains(self):
+        """Split self.trains into timetable-driven and manual train lists."""
+        self._timetable_trains = [t for t in self.trains if t.get("schedule_managed")]
+        self._manual_trains = [t for t in self.trains if not t.get("schedule_managed")]
+
     def _station_location(self, name):
         """Return station km location by name."""
         for s in self.stations:
@@ -311,7 +367,27 @@ class SimulationWidget(QWidget):
         3. Turn Green (All packets excluding CTCS-5) if:
            - A train is leaving (now >= leave_time).
            - AND the train passed recently (< 2s ago).
+
+        Results are cached per balise for the current one-second time bucket.
         """
+        current_dt = current_time or datetime.datetime.now()
+        bucket = int(current_dt.timestamp())
+        if bucket != self._eff_cache_bucket:
+            self._eff_cache.clear()
+            self._eff_cache_bucket = bucket
+        cached = self._eff_cache.get(balise_index)
+        if cached is not None:
+            return cached
+        result = self._compute_effective_balise_packets(balise_index, current_dt)
+        self._eff_cache[balise_index] = result
+        return result
+
+    def _invalidate_effective_packets(self):
+        """Drop cached effective packets after trains, balises or pass times change."""
+        self._eff_cache.clear()
+
+    def _compute_effective_balise_packets(self, balise_index, current_dt):
+        """Uncached body of _get_effective_balise_packets."""
         balise = self.balises[balise_index]
         all_packets = copy.deepcopy(balise)
 
@@ -319,8 +395,6 @@ class SimulationWidget(QWidget):
         if "CTCS-5" not in balise or not str(balise["CTCS-5"]).strip():
             return all_packets
 
-        current_dt = current_time or datetime.datetime.now()
-
         # Check if authorized to be Green
         is_green = False
 
@@ -546,6 +620,8 @@ class SimulationWidget(QWidget):
         """Reset runtime state for timetable trains."""
         # Remove schedule-managed trains from the scene
         self.trains = [t for t in self.trains if not t.get("schedule_managed")]
+        self._partition_trains()
+        self._invalidate_effective_packets()
         self.schedule_runtime = []
 
         for entry in self.schedule_entries:
@@ -621,9 +697,12 @@ class SimulationWidget(QWidget):
         train["planned_speed"] = base_speed
 
         self.trains.append(train)
+        self._timetable_trains.append(train)
+        self._invalidate_effective_packets()
         entry["created"] = True
         entry["train_ref"] = train
         self.trains_updated.emit(self.trains)
+        self._mark_dirty()
 
     def _update_schedule_trains(self):
         """Create or remove trains according to the timetable."""
@@ -660,7 +739,10 @@ class SimulationWidget(QWidget):
 
         if to_remove:
             self.trains = [t for t in self.trains if t not in to_remove]
+            self._partition_trains()
+            self._invalidate_effective_packets()
             self.trains_updated.emit(self.trains)
+            self._mark_dirty()
 
     def reset_train_positions(self):
         """
@@ -695,6 +777,7 @@ class SimulationWidget(QWidget):
             train["base_speed"] = initial_speed if initial_speed > 0 else default_max
             train["active_restrictions"] = []
 
+        self._invalidate_effective_packets()
         self.trains_updated.emit(self.trains)
 
     def set_follow_mode(self, enabled):
@@ -737,8 +820,10 @@ class SimulationWidget(QWidget):
     def stop_simulation(self):
         """停止仿真，重置状态。"""
         self.is_running = False
+        self.flush_logs()
         self.reset_train_positions()
         self.balise_pass_times.clear()  # Clear pass history
+        self._invalidate_effective_packets()
         if self.follow_train_mode:
             self.update_follow_offset()
         self.update()
@@ -758,74 +843,75 @@ class SimulationWidget(QWidget):
         4. 循环重置列车位置。
         """
         # Update train positions
-        for train in self.trains:
+        # Timetable-driven trains always update (independent of run/pause)
+        for train in self._timetable_trains:
             # Ensure position field exists
             if "current_location" not in train:
                 train["current_location"] = 0.0
 
-            # Timetable-driven trains always update (independent of run/pause)
-            if train.get("schedule_managed"):
-                sim_t = self.current_sim_time or datetime.datetime.now()
-                old_pos = train.get("current_location", 0.0)
-                new_pos = old_pos
+            sim_t = self.current_sim_time or datetime.datetime.now()
+            old_pos = train.get("current_location", 0.0)
+            new_pos = old_pos
 
-                dep = train.get("dep_time")
-                arr = train.get("arr_time")
-                leave = train.get("leave_time")
-                start_loc = train.get("start_loc", old_pos)
-                end_loc = train.get("end_loc", old_pos)
+            dep = train.get("dep_time")
+            arr = train.get("arr_time")
+            leave = train.get("leave_time")
+            start_loc = train.get("start_loc", old_pos)
+            end_loc = train.get("end_loc", old_pos)
 
-                status = train.get("status", "waiting")
+            status = train.get("status", "waiting")
 
-                # Before departure: hold position/speed zero
-                if status == "waiting":
-                    train["current_speed_limit"] = 0.0
-                    if dep and sim_t >= dep:
-                        status = "traveling"
+            # Before departure: hold position/speed zero
+            if status == "waiting":
+                train["current_speed_limit"] = 0.0
+                if dep and sim_t >= dep:
+                    status = "traveling"
 
-                if status == "traveling":
-                    # Move using standard step
-                    self.check_restrictions(train)
-                    current_speed_limit = float(train.get("current_speed_limit", train.get("base_speed", 100.0)))
-                    if current_speed_limit <= 0:
-                        current_speed_limit = float(train.get("base_speed", 100.0))
-
-                    base_step = 0.1 * (self.timer_interval / 100.0)
-                    step = base_step * (current_speed_limit / 100.0)
+            if status == "traveling":
+                # Move using standard step
+                self.check_restrictions(train)
+                current_speed_limit = float(train.get("current_speed_limit", train.get("base_speed", 100.0)))
+                if current_speed_limit <= 0:
+                    current_speed_limit = float(train.get("base_speed", 100.0))
 
-                    new_pos = old_pos + step if end_loc >= start_loc else old_pos - step
+                base_step = 0.1 * (self.timer_interval / 100.0)
+                step = base_step * (current_speed_limit / 100.0)
 
-                    # Clamp to destination
-                    if (end_loc >= start_loc and new_pos >= end_loc) or (end_loc < start_loc and new_pos <= end_loc):
-                        new_pos = end_loc
-                        status = "at_terminal"
-                        train["current_speed_limit"] = 0.0
-                    else:
-                        # Apply restrictions mid-run
-                        self.check_restrictions(train)
+                new_pos = old_pos + step if end_loc >= start_loc else old_pos - step
 
-                    # Time-based arrival safeguard
-                    if arr and sim_t >= arr:
-                        new_pos = end_loc
-                        status = "at_terminal"
-                        train["current_speed_limit"] = 0.0
+                # Clamp to destination
+                if (end_loc >= start_loc and new_pos >= end_loc) or (end_loc < start_loc and new_pos <= end_loc):
+                    new_pos = end_loc
+                    status = "at_terminal"
+                    train["current_speed_limit"] = 0.0
+                else:
+                    # Apply restrictions mid-run
+                    self.check_restrictions(train)
 
-                if status == "at_terminal":
+                # Time-based arrival safeguard
+                if arr and sim_t >= arr:
                     new_pos = end_loc
+                    status = "at_terminal"
                     train["current_speed_limit"] = 0.0
-                    if leave and sim_t >= leave:
-                        status = "finished"
 
-                train["status"] = status
-                train["current_location"] = new_pos
+            if status == "at_terminal":
+                new_pos = end_loc
+                train["current_speed_limit"] = 0.0
+                if leave and sim_t >= leave:
+                    status = "finished"
 
-                # Balise detection for timetable trains
-                self._process_balise_crossing(train, old_pos, new_pos)
-                continue
+            train["status"] = status
+            train["current_location"] = new_pos
 
-            # Manual trains only move when simulation is running
-            if not self.is_running:
-                continue
+            # Balise detection for timetable trains
+            self._process_balise_crossing(train, old_pos, new_pos)
+
+        # Manual trains only move when simulation is running
+        manual_trains = self._manual_trains if self.is_running else []
+        for train in manual_trains:
+            # Ensure position field exists
+            if "current_location" not in train:
+                train["current_location"] = 0.0
 
             old_pos = train["current_location"]
 
@@ -887,12 +973,40 @@ class SimulationWidget(QWidget):
             if info != self.last_tooltip_text:
                 QToolTip.showText(self.cursor_global_pos, info, self)
                 self.last_tooltip_text = info
+                self._mark_dirty()
 
         if self.follow_train_mode:
             self.update_follow_offset()
 
         self.trains_updated.emit(self.trains)
-        self.update()
+        if self._trains_need_repaint():
+            self._mark_dirty()
+
+    def _trains_need_repaint(self):
+        """Return True if any train moved visibly since the last paint."""
+        if len(self.trains) != self._painted_train_count:
+            return True
+        for train in self.trains:
+            painted_loc = train.get("_painted_loc")
+            if painted_loc is None:
+                return True
+            # Sub-pixel movement is accumulated against the last painted position
+            if abs(train.get("current_location", 0) - painted_loc) * self.scale > 0.5:
+                return True
+            if train.get("jump_h", 0.0) != train.get("_painted_jump", 0.0):
+                return True
+        return False
+
+    def _mark_dirty(self):
+        """Schedule a coalesced repaint for the next frame."""
+        self._dirty = True
+        if not self.paint_timer.isActive():
+            self.paint_timer.start()
+
+    def _flush_repaint(self):
+        """Repaint once if the view was marked dirty since the last paint."""
+        if self._dirty:
+            self.update()
 
     def _process_balise_crossing(self, train, old_pos, new_pos):
         """Check and process balises passed between two positions."""
@@ -907,6 +1021,7 @@ class SimulationWidget(QWidget):
 
                 # Record pass time for Exit Balises logic
                 self.balise_pass_times[i] = self.current_sim_time or datetime.datetime.now()
+                self._invalidate_effective_packets()
 
                 self.handle_balise_pass(train, balise, i)
 
@@ -916,29 +1031,40 @@ class SimulationWidget(QWidget):
         移除已过期的限制，并计算当前有效限速。
         """
         loc = train.get("current_location", 0.0)
-        restrs = train.get("active_restrictions", [])
-
-        # Filter expired
-        valid_restrs = []
-        for r in restrs:
-            # check end condition: end_km present and passed
-            if r["end_km"] is not None and loc > r["end_km"]:
-                continue
-            valid_restrs.append(r)
-
-        train["active_restrictions"] = valid_restrs
-
-        # Calculate speed
-        default_max = float(self.line_config.get("max_speed", 350.0))
-        base = train.get("base_speed", default_max)
-        limit = base
-
-        for r in valid_restrs:
-            if loc >= r["start_km"]:
-                if r["speed"] < limit:
-                    limit = r["speed"]
-
-        train["current_speed_limit"] = limit
+        heap = train.setdefault("active_restrictions", [])
+
+        # Restrictions expire in end_km order, so only the heap top needs checking
+        expired = False
+        while heap and loc > heap[0][0]:
+            heapq.heappop(heap)
+            expired = True
+
+        # Cached (heap, lo, hi, limit) stays valid while loc is inside [lo, hi)
+        cache = train.get("_restr_cache")
+        if expired or cache is None or cache[0] is not heap or not (cache[1] <= loc < cache[2]):
+            cache = self._restriction_window(heap, loc)
+            train["_restr_cache"] = cache
+
+        # Calculate speed; the line default is only needed when base_speed is unset
+        base = train.get("base_speed")
+        if base is None:
+            base = float(self.line_config.get("max_speed", 350.0))
+        train["current_speed_limit"] = min(base, cache[3])
+
+    @staticmethod
+    def _restriction_window(heap, loc):
+        """Return (heap, lo, hi, limit): the lowest active restriction speed and the
+        location interval [lo, hi) in which the set of started restrictions is unchanged."""
+        lo = float("-inf")
+        hi = float("inf")
+        limit = float("inf")
+        for _end_km, speed, start_km in heap:
+            if loc >= start_km:
+                lo = max(lo, start_km)
+                limit = min(limit, speed)
+            else:
+                hi = min(hi, start_km)
+        return heap, lo, hi, limit
 
     def handle_balise_pass(self, train: Dict, balise: Dict, index: int = -1):
         """Process logic when a train passes a balise.
@@ -988,13 +1114,11 @@ class SimulationWidget(QWidget):
                     start_km = b_loc + (d_tsr * scale / 1000.0)
                     end_km = start_km + (l_tsr * scale / 1000.0)
 
-                    restr = {
-                        "type": "CTCS-2",
-                        "start_km": start_km,
-                        "end_km": end_km,
-                        "speed": float(v_tsr)
-                    }
-                    train["active_restrictions"].append(restr)
+                    speed = float(v_tsr)
+                    heapq.heappush(train.setdefault("active_restrictions", []), (end_km, speed, start_km))
+                    train.pop("_restr_cache", None)
+                    if train.get("current_location", b_loc) >= start_km:
+                        train["current_speed_limit"] = min(train.get("current_speed_limit", speed), speed)
                 except Exception:
                     pass
 
@@ -1052,17 +1176,35 @@ class SimulationWidget(QWidget):
         # Log event
         train_name = train.get("name", "Unknown Train")
         if log_packets:
-            self.logger.log_balise_event(train_name, effective_balise)
+            self._queue_log(self.logger.log_balise_event, train_name, effective_balise)
         else:
             # Fallback for old manual config
             if "speed_limit" in effective_balise and str(effective_balise["speed_limit"]).strip():
                 try:
                     limit = float(effective_balise.get("speed_limit"))
                     train["base_speed"] = limit
-                    self.logger.log(f"Train {train_name} manual speed set to {limit}")
+                    self._queue_log(self.logger.log, f"Train {train_name} manual speed set to {limit}")
                 except:
                     pass
 
+    def _queue_log(self, log_func, *args):
+        """Defer a logger call to the next batched flush, stamped with the time of the event."""
+        self._log_queue.append((log_func, args, datetime.datetime.now()))
+        if not self.log_timer.isActive():
+            self.log_timer.start()
+
+    def flush_logs(self):
+        """立即写入所有等待批量写入的日志（停止仿真或关闭窗口时调用）。"""
+        self.log_timer.stop()
+        self._flush_log_queue()
+
+    def _flush_log_queue(self):
+        """Write all queued log entries."""
+        queue = self._log_queue
+        while queue:
+            log_func, args, timestamp = queue.popleft()
+            log_func(*args, timestamp=timestamp)
+
     def zoom_in(self):
         """放大视图。关闭自动适应。"""
         self.auto_fit = False
@@ -1214,9 +1356,10 @@ class SimulationWidget(QWidget):
                 if new_loc > self.track_length: new_loc = self.track_length
 
                 # Update balise
-                self.balises[self.dragged_balise_index]["location"] = float(f"{new_loc:.4f}")
+                self.balises[self.dragged_balise_index]["location"] = round(new_loc, 4)
+                self._invalidate_effective_packets()
 
-                self.update()  # Repaint
+                self._mark_dirty()  # Repaint
             return
 
         if self.is_panning:
@@ -1424,11 +1567,12 @@ class SimulationWidget(QWidget):
         Args:
             event (QPaintEvent): 绘图事件对象。
         """
+        self._dirty = False
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
 
         # Draw background
-        painter.fillRect(self.rect(), QColor(50, 50, 50))
+        painter.fillRect(self.rect(), self._color_background)
 
         # Auto fit logic
         if self.auto_fit:
@@ -1439,19 +1583,15 @@ class SimulationWidget(QWidget):
             self.offset_y = self.height() / 2
 
         # Draw track
-        pen = QPen(Qt.white)
-        pen.setWidth(2)
-        painter.setPen(pen)
+        painter.setPen(self._pen_track)
 
         start_x = self.offset_x
         end_x = self.offset_x + self.track_length * self.scale
         painter.drawLine(start_x, self.offset_y, end_x, self.offset_y)
 
         # Draw Stations
-        painter.setPen(Qt.white)
-        font = QFont()
-        font.setPointSize(10)
-        painter.setFont(font)
+        painter.setPen(self._pen_text)
+        painter.setFont(self._font_station)
         for station in self.stations:
             loc = station.get("location", 0)
             x = self.offset_x + loc * self.scale
@@ -1464,14 +1604,13 @@ class SimulationWidget(QWidget):
 
         # Draw Balises
         balise_groups = {}  # key -> list of (x_pos, balise_obj)
+        view_w = self.width()
+        # Triangles entirely outside this screen-space range are culled
+        cull_min_x = -self._triangle_w
+        cull_max_x = view_w + self._triangle_w
 
         for balise in self.balises:
             loc = balise.get("location", 0)
-            try:
-                b_type = int(balise.get("type", 0))
-            except ValueError:
-                b_type = 0
-
             x = self.offset_x + loc * self.scale
             y = self.offset_y
 
@@ -1490,35 +1629,33 @@ class SimulationWidget(QWidget):
                 balise_groups[key] = []
             balise_groups[key].append((x, balise))
 
+            # Group labels still need every member's x, but off-screen triangles are skipped
+            if x < cull_min_x or x > cull_max_x:
+                continue
+
+            try:
+                b_type = int(balise.get("type", 0))
+            except ValueError:
+                b_type = 0
+
             # Draw Triangle
-            triangle_h = 18
-            triangle_w = 24
             top_y = y  # Start directly from track line
 
-            points = [
-                QPointF(x, top_y),  # Top vertex
-                QPointF(x - triangle_w / 2, top_y + triangle_h),  # Bottom Left
-                QPointF(x + triangle_w / 2, top_y + triangle_h)  # Bottom Right
-            ]
-
             if b_type == 1:
                 # Active Balise: White Solid
-                painter.setBrush(QColor(255, 255, 255))
+                painter.setBrush(self._brush_active)
                 painter.setPen(Qt.NoPen)
-                painter.drawPolygon(QPolygonF(points))
             else:
                 # Passive Balise: Hollow (White Outline)
                 painter.setBrush(Qt.NoBrush)
-                pen = QPen(Qt.white)
-                pen.setWidth(2)
-                painter.setPen(pen)
-                painter.drawPolygon(QPolygonF(points))
+                painter.setPen(self._pen_balise)
+            painter.translate(x, top_y)
+            painter.drawPolygon(self._balise_triangle)
+            painter.translate(-x, -top_y)
 
         # Draw Balise Labels (Groups)
-        painter.setPen(Qt.white)
-        font_label = QFont()
-        font_label.setPointSize(8)
-        painter.setFont(font_label)
+        painter.setPen(self._pen_text)
+        painter.setFont(self._font_label)
         fm = painter.fontMetrics()
 
         for key, items in balise_groups.items():
@@ -1540,8 +1677,11 @@ class SimulationWidget(QWidget):
             if not label: continue
 
             text_w = fm.horizontalAdvance(label)
+            if center_x + text_w / 2 < 0 or center_x - text_w / 2 > view_w:
+                continue
+
             # Y position: Track Y + Triangle Height + Margin
-            text_y = self.offset_y + 18 + 12
+            text_y = self.offset_y + self._triangle_h + 12
 
             painter.drawText(int(center_x - text_w / 2), int(text_y), label)
 
@@ -1554,11 +1694,15 @@ class SimulationWidget(QWidget):
             jump_h = train.get("jump_h", 0.0)
             y = self.offset_y - jump_h
 
+            # Remember what was drawn so ticks can skip invisible movement
+            train["_painted_loc"] = loc
+            train["_painted_jump"] = jump_h
+
             if not self.train_img.isNull():
-                scale_factor = 0.06
-                w = self.train_img.width() * scale_factor
-                h = self.train_img.height() * scale_factor
-                painter.drawPixmap(QRect(int(x - w / 2), int(y - h - 5), int(w), int(h)), self.train_img)
+                painter.drawPixmap(QRect(int(x - self._tw / 2), int(y - self._th - 5), self._tw, self._th),
+                                   self.train_img)
             else:
                 painter.setBrush(Qt.red)
                 painter.drawRect(x - 10, y - 20, 20, 10)
+
+        self._painted_train_count = len(self.trains)
@@ -1,19 +1,40 @@
 """Map preview window module."""
 
 import datetime
+import time
 
-import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
+import numpy as np
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import (QApplication, QDialog, QHBoxLayout, QMessageBox,
                                QPushButton, QVBoxLayout, QCheckBox)
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.collections import LineCollection
-from matplotlib.figure import Figure
 
-# Set Chinese font support for Matplotlib
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+# Matplotlib and pandas are imported by _import_plotting() when the first
+# preview opens, so application startup doesn't pay for them
+mdates = None
+pd = None
+Figure = None
+FigureCanvas = None
+LineCollection = None
+_initialized = False
+
+
+def _import_plotting():
+    """Import the plotting modules into this module once and set up fonts."""
+    global mdates, pd, Figure, FigureCanvas, LineCollection, _initialized
+    if _initialized:
+        return
+
+    import matplotlib
+    import matplotlib.dates as mdates
+    import pandas as pd
+    from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    # Set Chinese font support for Matplotlib
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    _initialized = True
 
 
 class MapPreviewDialog(QDialog):
@@ -27,8 +48,23 @@ class MapPreviewDialog(QDialog):
         - Auto-fit view.
     """
 
+    MAX_LABELS = 100  # Hard cap on visible train labels (size of the Text artist pool)
+    LABEL_CELL_PX = (60, 20)  # Screen grid cell holding at most one label when dense
+    # Widest visible span (in days, matplotlib date units) that still shows seconds
+    SECONDS_FORMAT_MAX_SPAN = 600 / (24 * 3600)
+    # Segment count from which scrolling shows a raster snapshot instead of the vector layer
+    SNAPSHOT_MIN_SEGMENTS = 10000
+    FIGURE_DPI = 100
+    DRAG_DPI = 60  # Effective render DPI while scrolling
+    # Ctrl+Scroll zoom factors per wheel step
+    _SCALE_IN = 1 / 1.2
+    _SCALE_OUT = 1.2
+    # Column names for the 7 schedule CSV columns
+    SCHEDULE_COLUMNS = ["train", "start_station", "arr_start", "dep_start", "end_station", "leave_end", "arr_end"]
+
     def __init__(self, parent=None, schedule_data=None, stations=None, line_length=None):
         super().__init__(parent)
+        _import_plotting()
         self.setWindowTitle("列车运行图预览")
         self.resize(1000, 700)
         # Make dialog non-modal so other windows can be used
@@ -36,30 +72,66 @@ class MapPreviewDialog(QDialog):
         self.setAttribute(Qt.WA_DeleteOnClose)
 
         self.schedule_data = schedule_data if schedule_data else []
-        self.stations = stations if stations else []
-        self.line_length = line_length if line_length else 100.0
+        self._set_layout(stations, line_length)
 
         # Store original axis limits for auto-fit
         self.original_xlim = None
         self.original_ylim = None
 
+        # Date every parsed time is placed on; fixed so the limits and the
+        # plotted data stay on the same day while the dialog stays open
+        self._base_date = datetime.datetime.now().date()
+        # Fixed X range 0:00-24:00 of the base date, as matplotlib date numbers
+        self._xlim_full = (
+            mdates.date2num(datetime.datetime.combine(self._base_date, datetime.time(0, 0, 0))),
+            mdates.date2num(datetime.datetime.combine(self._base_date, datetime.time(23, 59, 59))),
+        )
+        # Format string of the x-axis DateFormatter currently installed
+        self._current_fmt = None
+
         # Optimization: Text Data Storage
         self.all_text_data = []  # List of (time_num, loc, text)
-        self.text_artists = []  # Current Text Artists
+        self.text_artists = []  # Pool of MAX_LABELS Text artists, reused by update_labels
+        # all_text_data as parallel arrays sorted by time_num, for range queries
+        self._text_time = np.empty(0)
+        self._text_loc = np.empty(0)
+        self._text_str = np.empty(0, dtype=object)
+
+        # Cached axes background without labels, for blitting label-only updates
+        self._bg = None
+        self._bg_view = None  # (xlim, ylim, canvas size) the background was captured at
+
+        # Static schedule layer and its raster stand-in shown while scrolling large schedules
+        self._lc = None
+        self._markers = None
+        self._snapshot = None
+        # _layout_key() the axes were laid out for, see update_data
+        self._plotted_layout = None
+
+        # Reduced-resolution rendering while scrolling
+        self._in_drag = False
+        self._screen_watched = False  # windowHandle().screenChanged connected, see showEvent
 
         # Debounce Timer for Label Rendering
         self.render_timer = QTimer(self)
         self.render_timer.setSingleShot(True)
         self.render_timer.setInterval(300)  # 300ms delay after interaction stops
         self.render_timer.timeout.connect(self.update_labels)
+        self._last_trigger_ts = 0.0  # time.monotonic() of the last render_timer restart
 
         self.layout = QVBoxLayout(self)
 
         # Chart Canvas
-        self.figure = Figure(figsize=(10, 8), dpi=100)
+        self.figure = Figure(figsize=(10, 8), dpi=self.FIGURE_DPI)
         self.canvas = FigureCanvas(self.figure)
         self.layout.addWidget(self.canvas)
 
+        # Throttle Timer for Canvas Redraws during rapid scrolling
+        self.draw_timer = QTimer(self)
+        self.draw_timer.setSingleShot(True)
+        self.draw_timer.setInterval(30)
+        self.draw_timer.timeout.connect(self.canvas.draw_idle)
+
         # Connect scroll event for zooming
         self.canvas.mpl_connect('scroll_event', self.on_scroll)
         self.canvas.mpl_connect('button_release_event', self.on_interaction_end)
@@ -69,9 +141,13 @@ class MapPreviewDialog(QDialog):
 
         self.chk_show_labels = QCheckBox("动态显示车次")
         self.chk_show_labels.setChecked(True)
-        self.chk_show_labels.setToolTip("选中后，仅在缩放至局部或车次较少时显示标签，防止卡顿")
+        self.chk_show_labels.setToolTip("选中后，车次较多时按屏幕网格抽样显示标签，防止卡顿")
         self.chk_show_labels.stateChanged.connect(self.trigger_update_labels)
 
+        self.chk_fast_save = QCheckBox("快速保存")
+        self.chk_fast_save.setChecked(True)
+        self.chk_fast_save.setToolTip("选中后，保存图片时使用低压缩率以加快保存（文件较大）")
+
         self.btn_auto_fit = QPushButton("自适应大小")
         self.btn_auto_fit.clicked.connect(self.auto_fit_view)
         self.btn_close = QPushButton("关闭")
@@ -81,6 +157,7 @@ class MapPreviewDialog(QDialog):
 
         self.btn_layout.addWidget(self.chk_show_labels)
         self.btn_layout.addStretch()
+        self.btn_layout.addWidget(self.chk_fast_save)
         self.btn_layout.addWidget(self.btn_auto_fit)
         self.btn_layout.addWidget(self.btn_save)
         self.btn_layout.addWidget(self.btn_close)
@@ -88,30 +165,37 @@ class MapPreviewDialog(QDialog):
 
         self.plot_graph()
 
-    def parse_time(self, time_str):
-        """解析时间字符串 HH:MM:SS or HH:MM"""
-        if not time_str or not isinstance(time_str, str):
-            return None
+    def parse_time_columns(self, frame):
+        """Parse every cell of a DataFrame of time strings (HH:MM:SS or HH:MM).
 
-        time_str = time_str.strip()
-        if not time_str:
-            return None
+        Returns a frame.shape datetime64 array on self._base_date,
+        NaT where a cell is empty or not HH:MM:SS / HH:MM.
+        """
+        shape = frame.shape
+        if frame.empty:
+            return np.empty(shape, dtype="datetime64[ns]")
 
-        formats = ["%H:%M:%S", "%H:%M"]
-        # Use a fixed dummy date for time comparison
-        base_date = datetime.datetime.now().date()
+        cells = pd.Series(frame.to_numpy(dtype=object).ravel()).str.strip()
+        parsed = pd.to_datetime(cells, format="%H:%M:%S", errors="coerce")
+        missing = parsed.isna()
+        if missing.any():
+            parsed[missing] = pd.to_datetime(cells[missing], format="%H:%M", errors="coerce")
 
-        for fmt in formats:
-            try:
-                t = datetime.datetime.strptime(time_str, fmt).time()
-                return datetime.datetime.combine(base_date, t)
-            except ValueError:
-                continue
-        return None
+        # Move the parsed time of day onto the base date
+        base_date = pd.Timestamp(self._base_date)
+        times = base_date + (parsed - parsed.dt.normalize())
+        return times.to_numpy(copy=True).reshape(shape)
 
     def plot_graph(self):
         """绘制运行图"""
         self.figure.clear()
+        self.text_artists = []
+        self._current_fmt = None
+        self._bg = None
+        self._lc = None
+        self._markers = None
+        self._snapshot = None
+        self._plotted_layout = self._layout_key()
         ax = self.figure.add_subplot(111)
 
         # 1. Prepare Y-Axis (Stations)
@@ -136,115 +220,32 @@ class MapPreviewDialog(QDialog):
             max_loc = self.line_length
 
         # 2. Prepare Data for Optimized Drawing
-        segments = []
-        points_x = []
-        points_y = []
-        texts = []
         train_color = "#E040FB"  # Bright purple
+        segments, text_data = self._build_schedule_arrays()
 
-        all_times = []
-
-        # 3. Process Schedule Data
-        for row in self.schedule_data:
-            if len(row) < 7:
-                continue
-
-            train_name = row[0]
-            start_st_name = row[1]
-            arr_start_str = row[2]
-            dep_start_str = row[3]
-            end_st_name = row[4]
-            leave_end_str = row[5]
-            arr_end_str = row[6]
-
-            # Find Locations
-            start_loc = next((s.get("location") for s in self.stations if s.get("name") == start_st_name), None)
-            end_loc = next((s.get("location") for s in self.stations if s.get("name") == end_st_name), None)
-
-            if start_loc is None or end_loc is None:
-                continue
-
-            # Parse Times
-            t_arr_start = self.parse_time(arr_start_str)
-            t_dep_start = self.parse_time(dep_start_str)
-            t_leave_end = self.parse_time(leave_end_str)
-            t_arr_end = self.parse_time(arr_end_str)
-
-            # Helper to handle time crossing midnight relative to a base time
-            def adjust_time(t, base):
-                if t and base and t < base:
-                    return t + datetime.timedelta(days=1)
-                return t
-
-            # Assuming strictly increasing time for the segment sequence:
-            base_t = t_arr_start or t_dep_start or t_arr_end or t_leave_end
-            if not base_t:
-                continue
-
-            # Adjust times sequentially
-            current_base = base_t
-
-            if t_arr_start:
-                current_base = t_arr_start
-
-            if t_dep_start:
-                t_dep_start = adjust_time(t_dep_start, current_base)
-                current_base = t_dep_start
-
-            if t_arr_end:
-                t_arr_end = adjust_time(t_arr_end, current_base)
-                current_base = t_arr_end
-
-            if t_leave_end:
-                t_leave_end = adjust_time(t_leave_end, current_base)
-
-            # Collect times for axis scaling
-            times_in_row = [t for t in [t_arr_start, t_dep_start, t_arr_end, t_leave_end] if t]
-            all_times.extend(times_in_row)
-
-            # Collect Segments for LineCollection
-
-            # 1. Dwell at Start (ArrStart -> DepStart)
-            if t_arr_start and t_dep_start:
-                s_num, e_num = mdates.date2num(t_arr_start), mdates.date2num(t_dep_start)
-                segments.append([(s_num, start_loc), (e_num, start_loc)])
-                points_x.extend([s_num, e_num])
-                points_y.extend([start_loc, start_loc])
-
-            # 2. Travel (DepStart -> ArrEnd)
-            t_start_travel = t_dep_start
-            t_end_travel = t_arr_end
-
-            if t_start_travel and t_end_travel:
-                start_num = mdates.date2num(t_start_travel)
-                end_num = mdates.date2num(t_end_travel)
-                # print(f"Processing travel: {train_name} from {start_num} to {end_num}") # Debug
-                segments.append([(start_num, start_loc), (end_num, end_loc)])
-                points_x.extend([start_num, end_num])
-                points_y.extend([start_loc, end_loc])
-
-                # Store text info but DO NOT DRAW YET
-                mid_time_num = (start_num + end_num) / 2
-                mid_loc = (start_loc + end_loc) / 2
-                self.all_text_data.append((mid_time_num, mid_loc, train_name))
-
-            # 3. Dwell at End (ArrEnd -> LeaveEnd)
-            if t_arr_end and t_leave_end:
-                s_num, e_num = mdates.date2num(t_arr_end), mdates.date2num(t_leave_end)
-                segments.append([(s_num, end_loc), (e_num, end_loc)])
-                points_x.extend([s_num, e_num])
-                points_y.extend([end_loc, end_loc])
+        # Every marker sits on a segment endpoint
+        points = segments.reshape(-1, 2)
 
-        # Batch Draw Lines using LineCollection
-        if segments:
-            lc = LineCollection(segments, colors=train_color, linewidths=2)
-            ax.add_collection(lc)
+        # Store text info but DO NOT DRAW YET
+        self.all_text_data = text_data
+        self._index_text_data()
 
-        # Draw Markers - Optimized
-        if points_x:
-            ax.scatter(points_x, points_y, color=train_color, s=10, edgecolors='none', zorder=3)
+        # Batch Draw Lines using LineCollection
+        # Rasterized so vector exports (PDF/SVG) embed one image instead of every segment
+        if len(segments):
+            self._lc = LineCollection(segments, colors=train_color, linewidths=2)
+            self._lc.set_rasterized(True)
+            ax.add_collection(self._lc)
+
+        # Draw Markers - a single Line2D shares one marker path for all points,
+        # unlike scatter's per-point PathCollection (markersize 3.16 ~ scatter s=10)
+        if len(points):
+            self._markers, = ax.plot(points[:, 0], points[:, 1], marker='o', markersize=3.16, linestyle='None',
+                                     color=train_color, markeredgewidth=0, zorder=3)
+            self._markers.set_rasterized(True)
 
         # Triggle Lazy Text Loading
+        self._create_label_pool(ax)
         self.trigger_update_labels()
 
         # 4. Configure Axes
@@ -259,10 +260,7 @@ class MapPreviewDialog(QDialog):
         ax.set_xlabel("时间")
 
         # Set fixed X Limits: 0:00 to 24:00
-        base_date = datetime.datetime.now().date()
-        time_start = datetime.datetime.combine(base_date, datetime.time(0, 0, 0))
-        time_end = datetime.datetime.combine(base_date, datetime.time(23, 59, 59))
-        ax.set_xlim(mdates.date2num(time_start), mdates.date2num(time_end))
+        ax.set_xlim(*self._xlim_full)
 
         # Dynamic formatter
         self._update_time_axis_format(ax)
@@ -271,7 +269,7 @@ class MapPreviewDialog(QDialog):
         ax.grid(True, linestyle='--', alpha=0.6)
 
         # Draw Horizontal dashed lines for stations
-        if all_times and station_locs:
+        if station_locs:
             xlims = ax.get_xlim()
             # Vectorsized hlines is faster
             ax.hlines(station_locs, xlims[0], xlims[1], colors='gray', linestyles=':', linewidth=0.5, alpha=0.5)
@@ -283,6 +281,123 @@ class MapPreviewDialog(QDialog):
         self.original_ylim = ax.get_ylim()
 
         self.canvas.draw()
+        # Labels are all still hidden here, so this is the clean label background
+        self._bg = self.canvas.copy_from_bbox(ax.bbox)
+        self._bg_view = (ax.get_xlim(), ax.get_ylim(), self.canvas.get_width_height())
+
+    def _layout_key(self):
+        """Line length and (name, location) of every station, to detect edits between plots."""
+        return self.line_length, [(s.get("name"), s.get("location")) for s in self.stations]
+
+    def _build_schedule_arrays(self):
+        """Turn schedule_data into line segments and train label data.
+
+        Returns:
+            tuple: ((M, 2, 2) array of (time_num, loc) segment endpoints,
+            list of (time_num, loc, text) labels for travel segments).
+        """
+        # Station name -> location, built once instead of scanning stations per row
+        # (reversed so the first station with a given name wins, as with next())
+        loc_by_name = {s.get("name"): s.get("location") for s in reversed(self.stations)}
+
+        # Process Schedule Data as one DataFrame instead of row by row
+        df = pd.DataFrame([row[:7] for row in self.schedule_data if len(row) >= 7],
+                          columns=self.SCHEDULE_COLUMNS)
+        df["start_loc"] = df["start_station"].map(loc_by_name)
+        df["end_loc"] = df["end_station"].map(loc_by_name)
+        df = df.dropna(subset=["start_loc", "end_loc"])
+
+        # Columns: arr_start, dep_start, arr_end, leave_end (NaT where missing),
+        # each rolled past midnight relative to the previous time in the row
+        times = self.parse_time_columns(df[["arr_start", "dep_start", "arr_end", "leave_end"]])
+        # `prev` tracks the last present time so a gap (NaT) doesn't break the comparison
+        prev = times[:, 0]
+        for j in range(1, 4):
+            cur = times[:, j]
+            late = ~np.isnat(cur) & ~np.isnat(prev) & (cur < prev)
+            cur = np.where(late, cur + np.timedelta64(1, "D"), cur)
+            times[:, j] = cur
+            prev = np.where(np.isnat(cur), prev, cur)
+        t_num = mdates.date2num(times)
+        start_locs = df["start_loc"].to_numpy(dtype=float)
+        end_locs = df["end_loc"].to_numpy(dtype=float)
+        has_t = ~np.isnan(t_num)
+
+        # 1. Dwell at Start (ArrStart -> DepStart)
+        dwell_start = has_t[:, 0] & has_t[:, 1]
+        # 2. Travel (DepStart -> ArrEnd)
+        travel = has_t[:, 1] & has_t[:, 2]
+        # 3. Dwell at End (ArrEnd -> LeaveEnd)
+        dwell_end = has_t[:, 2] & has_t[:, 3]
+
+        segments = np.empty((int(dwell_start.sum() + travel.sum() + dwell_end.sum()), 2, 2))
+        pos = 0
+        for mask, t0, t1, y0, y1 in ((dwell_start, 0, 1, start_locs, start_locs),
+                                     (travel, 1, 2, start_locs, end_locs),
+                                     (dwell_end, 2, 3, end_locs, end_locs)):
+            count = int(mask.sum())
+            block = segments[pos:pos + count]
+            block[:, 0, 0] = t_num[mask, t0]
+            block[:, 0, 1] = y0[mask]
+            block[:, 1, 0] = t_num[mask, t1]
+            block[:, 1, 1] = y1[mask]
+            pos += count
+
+        # Train labels sit at the middle of each travel segment
+        mid_time_nums = (t_num[travel, 1] + t_num[travel, 2]) / 2
+        mid_locs = (start_locs[travel] + end_locs[travel]) / 2
+        travel_names = df["train"].to_numpy(dtype=object)[travel].tolist()
+        text_data = list(zip(mid_time_nums.tolist(), mid_locs.tolist(), travel_names))
+        return segments, text_data
+
+    def _set_layout(self, stations, line_length):
+        """Store the stations and line length, falling back to no stations / 100 km."""
+        self.stations = stations if stations else []
+        self.line_length = line_length if line_length else 100.0
+
+    def update_data(self, schedule_data, stations=None, line_length=None):
+        """Show new schedule rows, reusing the existing axes and artists.
+
+        Only the line segments, markers and labels are swapped; everything
+        goes through plot_graph on first use or when the stations or line
+        length changed. stations and line_length are normalized as in __init__.
+        """
+        self.schedule_data = schedule_data if schedule_data else []
+        self._set_layout(stations, line_length)
+        if self._lc is None or self._markers is None or self._layout_key() != self._plotted_layout:
+            self.plot_graph()
+            return
+
+        self._hide_snapshot()
+        segments, text_data = self._build_schedule_arrays()
+        points = segments.reshape(-1, 2)
+        self._lc.set_segments(segments)
+        self._markers.set_data(points[:, 0], points[:, 1])
+
+        self.all_text_data = text_data
+        self._index_text_data()
+        self._bg = None
+        self.canvas.draw_idle()
+        self.trigger_update_labels()
+
+    def _create_label_pool(self, ax):
+        """Add MAX_LABELS hidden Text artists to ax for update_labels to reuse."""
+        self.text_artists = [
+            ax.text(0, 0, "", fontsize=8, color='black',
+                    bbox=dict(boxstyle='round,pad=0.2', fc='white', alpha=0.7),
+                    clip_on=True, visible=False)
+            for _ in range(self.MAX_LABELS)
+        ]
+
+    def _index_text_data(self):
+        """Rebuild the time-sorted label arrays from all_text_data."""
+        times = np.array([t for t, _, _ in self.all_text_data], dtype=float)
+        order = np.argsort(times, kind="stable")
+        self._text_time = times[order]
+        self._text_loc = np.array([loc for _, loc, _ in self.all_text_data], dtype=float)[order]
+        texts = np.empty(len(self.all_text_data), dtype=object)
+        texts[:] = [txt for _, _, txt in self.all_text_data]
+        self._text_str = texts[order]
 
     def _update_time_axis_format(self, ax=None):
         """根据X轴时间跨度动态调整时间显示格式"""
@@ -292,30 +407,32 @@ class MapPreviewDialog(QDialog):
             ax = self.figure.axes[0]
 
         xlim = ax.get_xlim()
-        # Convert matplotlib date numbers to timedelta
+        # Matplotlib date numbers are in days
         span_days = xlim[1] - xlim[0]
-        span_seconds = span_days * 24 * 3600
 
         # Choose format based on visible time span
-        if span_seconds <= 120:  # <= 2 minutes: show seconds
-            fmt = '%H:%M:%S'
-        elif span_seconds <= 600:  # <= 10 minutes: show seconds
+        if span_days <= self.SECONDS_FORMAT_MAX_SPAN:  # <= 10 minutes: show seconds
             fmt = '%H:%M:%S'
-        elif span_seconds <= 3600:  # <= 1 hour: show minutes
-            fmt = '%H:%M'
-        else:  # > 1 hour: show hours and minutes
+        else:  # > 10 minutes: show hours and minutes
             fmt = '%H:%M'
 
+        # Skip rebuilding the formatter (and invalidating tick caches) if unchanged
+        if fmt == self._current_fmt:
+            return
         ax.xaxis.set_major_formatter(mdates.DateFormatter(fmt))
+        self._current_fmt = fmt
 
     def on_scroll(self, event):
         """Handle scroll event for panning and zooming."""
+        self._bg = None  # View changes, cached background is stale
         self.trigger_update_labels()  # Restart timer on scroll
 
         if event.inaxes is None:
             return
 
         ax = event.inaxes
+        self._show_snapshot(ax)
+        self._enter_drag_mode()
         modifiers = QApplication.keyboardModifiers()
 
         # Determine scroll direction
@@ -332,34 +449,12 @@ class MapPreviewDialog(QDialog):
         ctrl_pressed = modifiers & Qt.ControlModifier
         shift_pressed = modifiers & Qt.ShiftModifier
 
-        if ctrl_pressed and shift_pressed:
-            # Ctrl+Shift+Scroll: Zoom X axis only
-            base_scale = 1.2
-            scale_factor = 1 / base_scale if direction == 1 else base_scale
-
-            xdata = event.xdata
-            new_width = (xlim[1] - xlim[0]) * scale_factor
-            relx = (xdata - xlim[0]) / (xlim[1] - xlim[0])
-
-            ax.set_xlim([xdata - new_width * relx, xdata + new_width * (1 - relx)])
-            self._update_time_axis_format(ax)
-
-        elif ctrl_pressed:
-            # Ctrl+Scroll: Zoom both axes
-            base_scale = 1.2
-            scale_factor = 1 / base_scale if direction == 1 else base_scale
-
-            xdata = event.xdata
-            ydata = event.ydata
-
-            new_width = (xlim[1] - xlim[0]) * scale_factor
-            new_height = (ylim[1] - ylim[0]) * scale_factor
-
-            relx = (xdata - xlim[0]) / (xlim[1] - xlim[0])
-            rely = (ydata - ylim[0]) / (ylim[1] - ylim[0])
-
-            ax.set_xlim([xdata - new_width * relx, xdata + new_width * (1 - relx)])
-            ax.set_ylim([ydata - new_height * rely, ydata + new_height * (1 - rely)])
+        if ctrl_pressed:
+            scale_factor = self._SCALE_IN if direction == 1 else self._SCALE_OUT
+            # Ctrl+Scroll zooms both axes, Ctrl+Shift+Scroll the X axis only
+            self._zoom_axis(ax.set_xlim, xlim, event.xdata, scale_factor)
+            if not shift_pressed:
+                self._zoom_axis(ax.set_ylim, ylim, event.ydata, scale_factor)
             self._update_time_axis_format(ax)
 
         elif shift_pressed:
@@ -373,14 +468,32 @@ class MapPreviewDialog(QDialog):
             pan_amount = (ylim[1] - ylim[0]) * 0.1 * direction
             ax.set_ylim(ylim[0] + pan_amount, ylim[1] + pan_amount)
 
-        self.canvas.draw_idle()
+        # Not restarted while pending, so a continuous scroll still redraws every 30ms
+        if not self.draw_timer.isActive():
+            self.draw_timer.start()
+
+    @staticmethod
+    def _zoom_axis(setter, lim, data, factor):
+        """Scale the span lim by factor around data, keeping data at the same relative spot."""
+        span = lim[1] - lim[0]
+        rel = (data - lim[0]) / span
+        new_span = span * factor
+        setter([data - new_span * rel, data + new_span * (1 - rel)])
 
     def on_interaction_end(self, event):
         """Handle interaction end (mouse release/button release)."""
+        self._bg = None
+        if self._leave_drag_mode():
+            self.canvas.draw_idle()
         self.trigger_update_labels()
 
     def trigger_update_labels(self):
         """Start/Restart debounce timer for label update."""
+        # Under a trackpad flood, restarting more often than every 20ms changes nothing
+        now = time.monotonic()
+        if self.render_timer.isActive() and now - self._last_trigger_ts < 0.02:
+            return
+        self._last_trigger_ts = now
         self.render_timer.start()
 
     def update_labels(self):
@@ -388,14 +501,18 @@ class MapPreviewDialog(QDialog):
         if not self.figure.axes:
             return
         ax = self.figure.axes[0]
+        restored = self._hide_snapshot()
+        restored = self._leave_drag_mode() or restored
 
         # 1. Check if labels are enabled
         if not self.chk_show_labels.isChecked():
-            # Clear all current texts
-            if self.text_artists:
-                for t in self.text_artists:
-                    t.remove()
-                self.text_artists.clear()
+            # Hide all current texts
+            shown = [t for t in self.text_artists if t.get_visible()]
+            if shown:
+                for t in shown:
+                    t.set_visible(False)
+                self._blit_labels(ax)
+            elif restored:
                 self.canvas.draw_idle()
             return
 
@@ -407,37 +524,143 @@ class MapPreviewDialog(QDialog):
         # Optimization: Don't reiterate if data is massive and fully zoomed out
         # Heuristic: Check density.
 
-        visible_candidates = []
-
         # Safe check for ylim (since it might be inverted)
         min_y, max_y = sorted(ylim)
 
-        for time_num, loc, text in self.all_text_data:
-            if xlim[0] <= time_num <= xlim[1] and min_y <= loc <= max_y:
-                visible_candidates.append((time_num, loc, text))
+        # Binary search the time-sorted arrays for the x range, then mask the y range
+        lo = np.searchsorted(self._text_time, xlim[0], side='left')
+        hi = np.searchsorted(self._text_time, xlim[1], side='right')
+        locs = self._text_loc[lo:hi]
+        idx = lo + np.flatnonzero((locs >= min_y) & (locs <= max_y))
 
         # 4. Limit Number of Labels
-        MAX_LABELS = 100  # Adjust this threshold for performance
-
-        should_draw = len(visible_candidates) <= MAX_LABELS
+        if len(idx) > self.MAX_LABELS:
+            # Too dense: keep the first label in each screen grid cell instead of hiding all
+            px = ax.transData.transform(np.column_stack((self._text_time[idx], self._text_loc[idx])))
+            cells = np.floor_divide(px, self.LABEL_CELL_PX).astype(np.int64)
+            _, first = np.unique(cells, axis=0, return_index=True)
+            idx = idx[np.sort(first)][:self.MAX_LABELS]
+
+        visible_candidates = list(zip(self._text_time[idx].tolist(), self._text_loc[idx].tolist(),
+                                      self._text_str[idx].tolist()))
+
+        # Reuse pooled artists in place; hide the unused remainder
+        for t, (time_num, loc, txt) in zip(self.text_artists, visible_candidates):
+            t.set_position((time_num, loc))
+            t.set_text(txt)
+            t.set_visible(True)
+        for t in self.text_artists[len(visible_candidates):]:
+            t.set_visible(False)
+
+        self._blit_labels(ax)
+
+    def _show_snapshot(self, ax):
+        """Swap the vector schedule layer for a raster of the last render.
+
+        Only used for large schedules; the vector layer comes back in
+        update_labels once scrolling has stopped.
+        """
+        if self._snapshot is not None or self._lc is None:
+            return
+        if len(self._lc.get_segments()) < self.SNAPSHOT_MIN_SEGMENTS:
+            return
 
-        # If too many labels, maybe just clear?
-        # Or maybe check zoom level?
-        # Let's enforce the limit to keep it fast.
+        # Crop the current Agg buffer to the axes (buffer rows run top-down)
+        buf = np.asarray(self.canvas.buffer_rgba())
+        x0, y0, x1, y1 = (int(round(v)) for v in ax.bbox.extents)
+        height = buf.shape[0]
+        image = buf[height - y1:height - y0, x0:x1].copy()
 
-        # Remove Old Artists
+        xlim = ax.get_xlim()
+        ylim = ax.get_ylim()
+        self._snapshot = ax.imshow(image, extent=(xlim[0], xlim[1], ylim[0], ylim[1]), origin='upper',
+                                   aspect='auto', interpolation='nearest', zorder=0)
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+
+        self._lc.set_visible(False)
+        if self._markers is not None:
+            self._markers.set_visible(False)
+        # Labels are baked into the snapshot; update_labels shows them again
         for t in self.text_artists:
-            t.remove()
-        self.text_artists.clear()
-
-        if should_draw:
-            for time_num, loc, txt in visible_candidates:
-                t = ax.text(time_num, loc, txt, fontsize=8, color='black',
-                            bbox=dict(boxstyle='round,pad=0.2', fc='white', alpha=0.7),
-                            clip_on=True)
-                self.text_artists.append(t)
+            t.set_visible(False)
+
+    def _hide_snapshot(self):
+        """Restore the vector schedule layer; return True if a snapshot was shown."""
+        if self._snapshot is None:
+            return False
+        self._snapshot.remove()
+        self._snapshot = None
+        self._lc.set_visible(True)
+        if self._markers is not None:
+            self._markers.set_visible(True)
+        self._bg = None
+        return True
+
+    def _enter_drag_mode(self):
+        """Render at DRAG_DPI while scrolling to cut Agg rasterization cost.
+
+        Lowering the canvas device pixel ratio shrinks the rendered buffer
+        while Qt still scales it to the full widget size. The setter is not
+        public matplotlib API, so backends without it keep full resolution.
+        """
+        # Relies on matplotlib's FigureCanvasBase._set_device_pixel_ratio only
+        # rescaling figure.dpi (figure._set_dpi(..., forward=False), no widget
+        # resize); the Qt backend calls it again itself on screen/DPR changes.
+        if self._in_drag or not hasattr(self.canvas, "_set_device_pixel_ratio"):
+            return
+        self._in_drag = True
+        self.canvas._set_device_pixel_ratio(
+            self.canvas.devicePixelRatioF() * self.DRAG_DPI / self.FIGURE_DPI)
+
+    def _leave_drag_mode(self):
+        """Restore full-resolution rendering; return True if drag mode was active."""
+        if not self._in_drag:
+            return False
+        # Take the ratio from the widget rather than a saved value: the canvas
+        # resets it by itself when the window moves to another screen.
+        self.canvas._set_device_pixel_ratio(self.canvas.devicePixelRatioF())
+        self._in_drag = False
+        self._bg = None
+        return True
+
+    def showEvent(self, event):
+        """Follow the window's screen so a monitor switch mid-scroll restores full resolution."""
+        super().showEvent(event)
+        window = self.windowHandle()
+        if window is not None and not self._screen_watched:
+            window.screenChanged.connect(self._on_screen_changed)
+            self._screen_watched = True
+        self._on_screen_changed()
+
+    def _on_screen_changed(self, *_):
+        """Leave drag mode, whose reduced ratio was computed for the previous screen."""
+        if self._leave_drag_mode():
+            self.canvas.draw_idle()
+
+    def _blit_labels(self, ax):
+        """Redraw only the label artists over the cached axes background.
+
+        The background is recaptured with one full draw (labels hidden) when
+        the view or canvas size changed since it was cached.
+        """
+        view = (ax.get_xlim(), ax.get_ylim(), self.canvas.get_width_height())
+        if self._bg is None or self._bg_view != view:
+            shown = [t for t in self.text_artists if t.get_visible()]
+            for t in shown:
+                t.set_visible(False)
+            self.canvas.draw()
+            self._bg = self.canvas.copy_from_bbox(ax.bbox)
+            self._bg_view = view
+            for t in shown:
+                t.set_visible(True)
+        else:
+            self.canvas.restore_region(self._bg)
 
-        self.canvas.draw_idle()
+        for t in self.text_artists:
+            if t.get_visible():
+                ax.draw_artist(t)
+        self.canvas.blit(ax.bbox)
 
     def auto_fit_view(self):
         """恢复到自适应大小视图（X轴0:00-24:00）"""
@@ -445,12 +668,10 @@ class MapPreviewDialog(QDialog):
             return
 
         ax = self.figure.axes[0]
+        self._hide_snapshot()
 
         # Reset to fixed 0:00-24:00 X range
-        base_date = datetime.datetime.now().date()
-        time_start = datetime.datetime.combine(base_date, datetime.time(0, 0, 0))
-        time_end = datetime.datetime.combine(base_date, datetime.time(23, 59, 59))
-        ax.set_xlim(mdates.date2num(time_start), mdates.date2num(time_end))
+        ax.set_xlim(*self._xlim_full)
 
         if self.original_ylim:
             ax.set_ylim(self.original_ylim)
@@ -461,5 +682,7 @@ class MapPreviewDialog(QDialog):
         from PySide6.QtWidgets import QFileDialog
         path, _ = QFileDialog.getSaveFileName(self, "保存图片", "train_graph.png", "PNG Images (*.png)")
         if path:
-            self.figure.savefig(path, dpi=300)
+            # PNG zlib level dominates save time: 1 is fast, 9 gives the smallest file
+            compress_level = 1 if self.chk_fast_save.isChecked() else 9
+            self.figure.savefig(path, dpi=300, bbox_inches=None, pil_kwargs={'compress_level': compress_level})
             QMessageBox.information(self, "信息", f"图片已保存到 {path}")
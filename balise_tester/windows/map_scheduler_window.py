@@ -1,19 +1,266 @@
 """Window for editing train schedules."""
 
 import csv
-import datetime
 import os
+import re
+from functools import lru_cache, partial
 from typing import Optional
 
-from PySide6.QtCore import QSettings, Qt
+import numpy as np
+from PySide6.QtCore import (QAbstractTableModel, QCoreApplication, QModelIndex, QObject, QSettings, Qt,
+                            QThread, QTimer, Signal, Slot)
 from PySide6.QtGui import QAction, QColor, QBrush, QKeySequence
-from PySide6.QtWidgets import (QFileDialog, QHeaderView, QMainWindow, QMessageBox, QTableWidget,
-                               QTableWidgetItem, QVBoxLayout, QWidget)
+from PySide6.QtWidgets import (QAbstractItemView, QFileDialog, QHeaderView, QMainWindow, QMessageBox,
+                               QTableView, QVBoxLayout, QWidget)
 
 from ui.map import Ui_Map_MainWindow
 from .map_preview_dialog import MapPreviewDialog
 
 
+# "H:M" or "H:M:S" with 1-2 digit fields, as strptime's %H:%M[:%S] accepts
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?", re.ASCII)
+
+
+@lru_cache(maxsize=4096)
+def _parse_hhmmss(time_str):
+    """Parse "HH:MM:SS" or "HH:MM" into an (hour, minute, second) tuple; None if invalid.
+
+    Cached, as schedules repeat the same round times across many trains.
+    One regex match replaces trying strptime formats, which is much slower.
+    """
+    m = _TIME_RE.fullmatch(time_str.strip())
+    if not m:
+        return None
+
+    hour = int(m[1])
+    minute = int(m[2])
+    second = int(m[3] or 0)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    return hour, minute, second
+
+
+def _to_sec(hms):
+    """(hour, minute, second) -> seconds of day."""
+    hour, minute, second = hms
+    return hour * 3600 + minute * 60 + second
+
+
+def _finish_thread(thread, *_):
+    """Stop a QThread's event loop and block until it has exited."""
+    if thread.isRunning():
+        thread.quit()
+        thread.wait()
+
+
+class ScheduleModel(QAbstractTableModel):
+    """Table model for the schedule editor, backed by a plain list of rows of strings.
+
+    Also holds the highlighted current/next train rows, so a highlight
+    change only repaints the affected rows.
+    """
+
+    # row, column, old text, new text of a cell changed through setData
+    cell_edited = Signal(int, int, str, str)
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self._col_count = len(headers)
+        self._rows = []
+
+        # Highlighted rows (-1 = none)
+        self.current_row = -1
+        self.next_row = -1
+        self._brush_current = QBrush(QColor("#90EE90"))  # Light Green
+        self._brush_next = QBrush(QColor("#FFFFE0"))  # Light Yellow
+        self._brush_highlight_text = QBrush(Qt.black)
+        # Background brush of each highlighted row, as last announced through dataChanged
+        self._row_brush = {}
+
+    @property
+    def rows(self):
+        """The backing list of rows. Read-only for callers; edit through setData."""
+        return self._rows
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._col_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self._rows[row][index.column()]
+        if role == Qt.BackgroundRole:
+            return self._row_brush.get(row)
+        if role == Qt.ForegroundRole:
+            if row in self._row_brush:
+                return self._brush_highlight_text
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        text = "" if value is None else str(value)
+        row = self._rows[index.row()]
+        old = row[index.column()]
+        if old == text:
+            return True
+        row[index.column()] = text
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.cell_edited.emit(index.row(), index.column(), old, text)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def insertRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or count <= 0:
+            return False
+        cols = self._col_count
+        self.beginInsertRows(parent, row, row + count - 1)
+        self._rows[row:row] = [[""] * cols for _ in range(count)]
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or count <= 0 or row < 0 or row + count > len(self._rows):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self._rows[row:row + count]
+        self.endRemoveRows()
+        return True
+
+    def insert_rows_data(self, row, rows):
+        """Insert a block of rows at row with one rowsInserted (used to restore deleted rows)."""
+        self.beginInsertRows(QModelIndex(), row, row + len(rows) - 1)
+        self._rows[row:row] = [list(row_data) for row_data in rows]
+        self.endInsertRows()
+
+    def set_rows(self, data):
+        """Replace all rows with one model reset. Rows are padded/cut to the column count.
+
+        Cells must already be str, as csv.reader and get_table_data produce.
+        """
+        cols = self._col_count
+        self.beginResetModel()
+        # Full-width rows (the usual case) are copied as a whole, not cell by cell
+        self._rows = [list(row_data) if len(row_data) == cols
+                      else list(row_data[:cols]) + [""] * (cols - len(row_data))
+                      for row_data in data]
+        self.endResetModel()
+
+    def reset_from_iter(self, rows):
+        """Replace all rows in one pass over an iterable (e.g. a csv.reader), with one model reset.
+
+        Full-width row lists are adopted as they are, so they must be fresh lists of str.
+        """
+        cols = self._col_count
+        self.beginResetModel()
+        try:
+            self._rows = [row_data if len(row_data) == cols
+                          else row_data[:cols] + [""] * (cols - len(row_data))
+                          for row_data in rows]
+        finally:
+            self.endResetModel()
+
+    def set_highlight(self, current_row, next_row):
+        """Move the current/next highlights, repainting only rows whose brush changed."""
+        if current_row == self.current_row and next_row == self.next_row:
+            return
+        self.current_row = current_row
+        self.next_row = next_row
+
+        row_brush = {}
+        if next_row != -1:
+            row_brush[next_row] = self._brush_next
+        if current_row != -1:
+            row_brush[current_row] = self._brush_current
+
+        old_brush = self._row_brush
+        self._row_brush = row_brush
+        last_col = self._col_count - 1
+        for row in old_brush.keys() | row_brush.keys():
+            if old_brush.get(row) is row_brush.get(row):
+                continue
+            if 0 <= row < len(self._rows):
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_col),
+                                      [Qt.BackgroundRole, Qt.ForegroundRole])
+
+
+class HighlightWorker(QObject):
+    """Finds the current and next train for each simulation tick, off the GUI thread.
+
+    Works only on the seconds-of-day arrays MapSchedulerWindow sends when
+    the table changes; it never touches the model.
+    """
+
+    # current row, next row (-1 = none)
+    highlight_changed = Signal(int, int)
+
+    def __init__(self):
+        super().__init__()
+        # Departure/arrival seconds of day per row (-1 = no valid times;
+        # arrival +86400 when it is past midnight)
+        self._dep_sec = np.empty(0, dtype=np.int32)
+        self._arr_sec = np.empty(0, dtype=np.int32)
+        # Rows with valid times ordered by departure, and their departures
+        self._dep_order = np.empty(0, dtype=np.intp)
+        self._dep_sorted = np.empty(0, dtype=np.int32)
+
+        self._last_dt = None
+        self._last_rows = (-1, -1)
+
+    @Slot(object, object)
+    def set_times(self, dep_sec, arr_sec):
+        """Swap in the time arrays of a changed table and re-evaluate the last tick."""
+        self._dep_sec = dep_sec
+        self._arr_sec = arr_sec
+        # Stable sort: ties keep row order, so the first row wins as with a linear scan
+        valid = np.flatnonzero(dep_sec >= 0)
+        self._dep_order = valid[np.argsort(dep_sec[valid], kind="stable")]
+        self._dep_sorted = dep_sec[self._dep_order]
+        if self._last_dt is not None:
+            self.on_tick(self._last_dt)
+
+    @Slot(object)
+    def on_tick(self, current_dt):
+        """Highlight current train (Green) and next train (Yellow)."""
+        if not current_dt:
+            return
+        self._last_dt = current_dt
+
+        # Current time as seconds of day (ignoring date shift for daily schedule)
+        now_time = current_dt.time()
+        now = _to_sec((now_time.hour, now_time.minute, now_time.second)) + now_time.microsecond / 1e6
+
+        # Next train: earliest departure strictly after now, by binary search
+        idx = int(np.searchsorted(self._dep_sorted, now, side="right"))
+        next_train_row = int(self._dep_order[idx]) if idx < len(self._dep_order) else -1
+
+        # Current train: first row already departed and not yet arrived
+        running = (self._dep_sec >= 0) & (self._dep_sec <= now) & (now <= self._arr_sec)
+        current_row = int(np.argmax(running)) if running.any() else -1
+
+        # Only cross back to the GUI thread when something changed
+        if (current_row, next_train_row) != self._last_rows:
+            self._last_rows = (current_row, next_train_row)
+            self.highlight_changed.emit(current_row, next_train_row)
+
+
 class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
     """Train schedule editor window.
 
@@ -21,6 +268,12 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
     train schedules.
     """
 
+    # Columns read for the highlight: departure time and arrival time
+    DEP_COL, ARR_COL = 3, 6
+
+    # Departure/arrival seconds-of-day arrays for the highlight worker
+    times_changed = Signal(object, object)
+
     def __init__(self, parent: Optional[QWidget] = None):
         """Initialize the map scheduler window."""
         super().__init__(parent)
@@ -29,7 +282,12 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
         # Initialize Data Table
         self.init_table()
 
-        # Undo/Redo Stacks
+        # Undo/Redo Stacks of edit deltas:
+        #   ("edit", row, col, old_text, new_text)
+        #   ("insert", row)
+        #   ("delete", [(first, [row_data, ...]), ...])  contiguous runs, ascending
+        #   ("reset", rows)                     whole-table swap (new/load file): applying it
+        #                                       installs rows and yields ("reset", replaced_rows)
         self.undo_stack = []
         self.redo_stack = []
         self.max_history = 50
@@ -40,12 +298,27 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
         # Connect Menus
         self.init_menus()
 
+        # Current/next train lookup runs on a worker thread fed by simulation ticks
+        self._highlight_thread = QThread(self)
+        self._highlight_worker = HighlightWorker()
+        self._highlight_worker.moveToThread(self._highlight_thread)
+        self._highlight_thread.finished.connect(self._highlight_worker.deleteLater)
+        self.times_changed.connect(self._highlight_worker.set_times, Qt.QueuedConnection)
+        self._highlight_worker.highlight_changed.connect(self.model.set_highlight, Qt.QueuedConnection)
+        self._highlight_thread.start()
+        QCoreApplication.instance().aboutToQuit.connect(self._stop_highlight_thread)
+        # The thread is a child of this window: end it before Qt deletes it, however
+        # the window goes away. Bound to the thread, not self, which is already dying.
+        self.destroyed.connect(partial(_finish_thread, self._highlight_thread))
+
         # Connect to Simulation Time if parent has it
+        self._sim_widget = None
         if parent and hasattr(parent, 'simulation_widget'):
-            parent.simulation_widget.sim_time_updated.connect(self.update_highlight)
+            self._sim_widget = parent.simulation_widget
+            self._sim_widget.sim_time_updated.connect(self._highlight_worker.on_tick, Qt.QueuedConnection)
 
-        # Initial State
-        self.save_state_to_history()
+        # Recent-file settings, opened once for the window's lifetime
+        self._settings = QSettings("BaliseTester", "MapScheduler")
 
         # Load last file
         self.load_last_file()
@@ -53,26 +326,40 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
     def init_table(self):
         """初始化表格控件"""
         self.layout = QVBoxLayout(self.centralwidget)
-        self.table_widget = QTableWidget()
-        self.layout.addWidget(self.table_widget)
 
         # Columns: "列车、起始站、到起始站时间、发车时间、到达站、出到达站时间、到达时间"
         self.headers = ["列车", "起始站", "到起始站时间", "发车时间", "到达站", "出到达站时间", "到达时间"]
-        self.table_widget.setColumnCount(len(self.headers))
-        self.table_widget.setHorizontalHeaderLabels(self.headers)
-        self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-
-        # Connect change signal for undo/redo (debouncing might be needed for text changes, 
-        # but for cell changed it's okay)
-        self.table_widget.itemChanged.connect(self.on_item_changed)
+        self.model = ScheduleModel(self.headers, self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.layout.addWidget(self.table_view)
+
+        # Record cell edits for undo/redo
+        self.model.cell_edited.connect(self.on_cell_edited)
+
+        # Edits to the same cell within 300ms are merged into one history entry
+        self._pending_edit = None  # [row, col, old, new] not yet on the undo stack
+        self._history_timer = QTimer(self)
+        self._history_timer.setSingleShot(True)
+        self._history_timer.setInterval(300)
+        self._history_timer.timeout.connect(self.flush_pending_edit)
+
+        # Departure/arrival times are re-parsed for the highlight worker once per
+        # burst of table changes (next event loop pass), not per tick
+        self._time_cache_timer = QTimer(self)
+        self._time_cache_timer.setSingleShot(True)
+        self._time_cache_timer.setInterval(0)
+        self._time_cache_timer.timeout.connect(self._rebuild_time_cache)
+        self.model.modelReset.connect(self._invalidate_time_cache)
+        self.model.rowsInserted.connect(self._invalidate_time_cache)
+        self.model.rowsRemoved.connect(self._invalidate_time_cache)
+        self.model.cell_edited.connect(self._on_time_cell_edited)
 
         # Track programmatic changes to avoid loop
         self.is_programmatic_change = False
 
-        # Cache last highlighted rows to avoid repainting entire table each tick
-        self.last_current_row = -1
-        self.last_next_row = -1
-
     def init_menus(self):
         """初始化菜单行为"""
         # --- File / New ---
@@ -136,6 +423,7 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
 
     def show_preview(self):
         """显示运行图预览"""
+        self.flush_pending_edit()
         data = self.get_table_data()
 
         # We need stations list. Try to get from parent main window
@@ -152,53 +440,70 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
 
     def get_table_data(self):
         """Get current table data as list of lists"""
-        rows = self.table_widget.rowCount()
-        cols = self.table_widget.columnCount()
-        data = []
-        for r in range(rows):
-            row_data = []
-            for c in range(cols):
-                item = self.table_widget.item(r, c)
-                row_data.append(item.text() if item else "")
-            data.append(row_data)
-        return data
-
-    def set_table_data(self, data):
-        """Set table data from list of lists"""
+        return [list(row_data) for row_data in self.model.rows]
+
+    def set_table_data(self, data, adopt=False):
+        """Set table data from list of lists.
+
+        With adopt, data may be any iterable of fresh row lists (e.g. a
+        csv.reader); rows are taken over without copying.
+        """
         self.is_programmatic_change = True
-        self.table_widget.setRowCount(0)
-        self.table_widget.setRowCount(len(data))
-        for r, row_data in enumerate(data):
-            for c, text in enumerate(row_data):
-                if c < self.table_widget.columnCount():
-                    self.table_widget.setItem(r, c, QTableWidgetItem(str(text)))
-        self.is_programmatic_change = False
+        # No repaints while the model resets; the view repaints once afterwards
+        self.table_view.setUpdatesEnabled(False)
+        try:
+            if adopt:
+                self.model.reset_from_iter(data)
+            else:
+                self.model.set_rows(data)
+        finally:
+            self.table_view.setUpdatesEnabled(True)
+            self.is_programmatic_change = False
 
-    def save_state_to_history(self):
-        """Save current state to undo stack"""
+    def push_history(self, entry):
+        """Push an edit delta onto the undo stack."""
         if self.is_programmatic_change:
             return
 
-        current_state = self.get_table_data()
-
-        # Avoid duplicate states if nothing changed (optional)
-        if self.undo_stack and self.undo_stack[-1] == current_state:
+        self.flush_pending_edit()
+        # Reloading identical contents is not a change; list equality stops at the first
+        # differing row, so this is cheaper than hashing both tables
+        if entry[0] == "reset" and entry[1] == self.model.rows:
             return
 
-        self.undo_stack.append(current_state)
+        self.undo_stack.append(entry)
         if len(self.undo_stack) > self.max_history:
             self.undo_stack.pop(0)
 
         # Clear redo stack on new change
         self.redo_stack.clear()
 
-    def on_item_changed(self, item):
-        self.save_state_to_history()
+    def flush_pending_edit(self):
+        """Move the pending (debounced) cell edit onto the undo stack."""
+        self._history_timer.stop()
+        if self._pending_edit is None:
+            return
+        row, col, old, new = self._pending_edit
+        self._pending_edit = None
+        # Merged edits that ended on the original text leave nothing to undo
+        if old != new:
+            self.push_history(("edit", row, col, old, new))
+
+    def on_cell_edited(self, row, col, old, new):
+        if self.is_programmatic_change:
+            return
+
+        pending = self._pending_edit
+        if pending is not None and pending[0] == row and pending[1] == col:
+            pending[3] = new
+        else:
+            self.flush_pending_edit()
+            self._pending_edit = [row, col, old, new]
+        self._history_timer.start()
 
     def load_last_file(self):
         """加载最近编辑的文件"""
-        settings = QSettings("BaliseTester", "MapScheduler")
-        last_path = settings.value("last_file_path", "")
+        last_path = self._settings.value("last_file_path", "")
         if last_path and os.path.exists(last_path):
             try:
                 self.load_csv(last_path)
@@ -208,19 +513,23 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
 
     def save_last_path(self, path):
         """保存最近编辑的文件路径"""
-        settings = QSettings("BaliseTester", "MapScheduler")
-        settings.setValue("last_file_path", path)
+        self._settings.setValue("last_file_path", path)
 
     def load_csv(self, path):
         """读取CSV并填充表格"""
-        with open(path, 'r', encoding='utf-8-sig') as f:
+        self.flush_pending_edit()
+        # Loading replaces the model's row list rather than mutating it,
+        # so the old list goes into history without a copy
+        old_rows = self.model.rows
+
+        # Large read buffer; rows stream from the reader straight into the model
+        with open(path, 'r', encoding='utf-8-sig', newline='', buffering=1 << 20) as f:
             reader = csv.reader(f)
-            header = next(reader, None)  # Skip header
-            data = list(reader)
+            next(reader, None)  # Skip header
+            self.set_table_data(reader, adopt=True)
 
-        self.set_table_data(data)
         self.current_file_path = path
-        self.save_state_to_history()
+        self.push_history(("reset", old_rows))
         self.save_last_path(path)
 
     # --- Actions ---
@@ -233,17 +542,17 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
         return os.path.join(project_root, "data", "map")
 
     def new_file(self):
-        if self.table_widget.rowCount() > 0:
+        if self.model.rowCount() > 0:
             res = QMessageBox.question(self, "确认", "新建将清空当前表格，是否继续？",
                                        QMessageBox.Yes | QMessageBox.No)
             if res != QMessageBox.Yes:
                 return
 
-        self.is_programmatic_change = True
-        self.table_widget.setRowCount(0)
+        self.flush_pending_edit()
+        old_rows = self.model.rows
+        self.set_table_data([])
         self.current_file_path = None
-        self.is_programmatic_change = False
-        self.save_state_to_history()
+        self.push_history(("reset", old_rows))
 
     def import_file(self):
         default_dir = self._get_map_data_dir()
@@ -260,6 +569,7 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
             QMessageBox.critical(self, "错误", f"导入失败: {str(e)}")
 
     def save_file(self):
+        self.flush_pending_edit()
         if not self.current_file_path:
             self.save_as_file()
         else:
@@ -276,156 +586,140 @@ class MapSchedulerWindow(QMainWindow, Ui_Map_MainWindow):
 
     def _write_csv(self, path):
         try:
-            data = self.get_table_data()
             with open(path, 'w', newline='', encoding='utf-8-sig') as f:
                 writer = csv.writer(f)
                 writer.writerow(self.headers)
-                writer.writerows(data)
+                # Straight from the model's rows, no intermediate copy
+                writer.writerows(self.model.rows)
             self.current_file_path = path
             self.save_last_path(path)
         except Exception as e:
             QMessageBox.critical(self, "错误", f"保存失败: {str(e)}")
 
     def add_row(self):
-        self.is_programmatic_change = True
-        row = self.table_widget.rowCount()
-        self.table_widget.insertRow(row)
-        self.is_programmatic_change = False
-        self.save_state_to_history()
+        self.flush_pending_edit()
+        row = self.model.rowCount()
+        self.model.insertRows(row, 1)
+        self.push_history(("insert", row))
 
     def delete_row(self):
         """Delete selected rows or current row."""
-        # Get all selected rows
-        selected_rows = set()
-        for idx in self.table_widget.selectedIndexes():
-            selected_rows.add(idx.row())
+        # One index per selected row (the view selects whole rows), not one per cell
+        selected_rows = {idx.row() for idx in self.table_view.selectionModel().selectedRows()}
 
         # Fallback to current row if no selection but there is a current item
         if not selected_rows:
-            curr = self.table_widget.currentRow()
+            curr = self.table_view.currentIndex().row()
             if curr >= 0:
                 selected_rows.add(curr)
 
         if not selected_rows:
             return
 
+        self.flush_pending_edit()
+        # Group consecutive rows into (first, count) runs, each removed with one call
+        runs = []
+        for row in sorted(selected_rows):
+            if runs and runs[-1][0] + runs[-1][1] == row:
+                runs[-1][1] += 1
+            else:
+                runs.append([row, 1])
+
+        rows = self.model.rows
+        removed = [(first, [list(row_data) for row_data in rows[first:first + count]]) for first, count in runs]
+        # Remove in reverse order to keep indices valid while removing
+        for first, count in reversed(runs):
+            self.model.removeRows(first, count)
+        self.push_history(("delete", removed))
+
+    def _apply_history(self, entry, reverse):
+        """Apply an undo-stack delta forwards (redo) or backwards (undo).
+
+        Returns the entry to push onto the opposite stack.
+        """
         self.is_programmatic_change = True
-        # Sort in reverse order to keep indices valid while removing
-        for row in sorted(selected_rows, reverse=True):
-            self.table_widget.removeRow(row)
-        self.is_programmatic_change = False
-        self.save_state_to_history()
+        try:
+            kind = entry[0]
+            if kind == "edit":
+                _, row, col, old, new = entry
+                self.model.setData(self.model.index(row, col), old if reverse else new)
+            elif kind == "insert":
+                if reverse:
+                    self.model.removeRows(entry[1], 1)
+                else:
+                    self.model.insertRows(entry[1], 1)
+            elif kind == "delete":
+                if reverse:
+                    for first, block in entry[1]:
+                        self.model.insert_rows_data(first, block)
+                else:
+                    for first, block in reversed(entry[1]):
+                        self.model.removeRows(first, len(block))
+            elif kind == "reset":
+                # A swap either way; the replaced list is detached, so keep it as is
+                replaced = self.model.rows
+                self.model.set_rows(entry[1])
+                entry = ("reset", replaced)
+        finally:
+            self.is_programmatic_change = False
+        return entry
 
     def undo(self):
-        if len(self.undo_stack) <= 1:
+        self.flush_pending_edit()
+        if not self.undo_stack:
             return
 
-        # Current state is top of undo stack
-        current = self.undo_stack.pop()
-        self.redo_stack.append(current)
-
-        # Previous state
-        prev = self.undo_stack[-1]
-        self.set_table_data(prev)
+        entry = self.undo_stack.pop()
+        self.redo_stack.append(self._apply_history(entry, reverse=True))
 
     def redo(self):
+        self.flush_pending_edit()
         if not self.redo_stack:
             return
 
-        next_state = self.redo_stack.pop()
-        self.undo_stack.append(next_state)
-        self.set_table_data(next_state)
-
-    def _parse_time(self, time_str):
-        if not time_str or not isinstance(time_str, str):
-            return None
-        time_str = time_str.strip()
-        if not time_str: return None
-
-        # Use simple today date
-        today = datetime.date.today()
-
-        for fmt in ["%H:%M:%S", "%H:%M"]:
-            try:
-                t = datetime.datetime.strptime(time_str, fmt).time()
-                return datetime.datetime.combine(today, t)
-            except ValueError:
-                continue
-        return None
-
-    def _apply_row_style(self, row, bg_color=None, fg_color=None):
-        """Apply background/foreground to a single row only (lightweight)."""
-        cols = self.table_widget.columnCount()
-        for c in range(cols):
-            item = self.table_widget.item(row, c)
-            if not item:
-                continue
-            if bg_color is None:
-                item.setData(Qt.BackgroundRole, None)
-            else:
-                item.setBackground(QBrush(bg_color))
-            if fg_color is None:
-                item.setForeground(QBrush(Qt.white))
-            else:
-                item.setForeground(QBrush(fg_color))
-
-    def update_highlight(self, current_dt):
-        """Highlight current train (Green) and next train (Yellow)."""
-        if not current_dt or self.table_widget.rowCount() == 0:
-            return
-
-        # Current time normalized to today for comparison (ignoring date shift for daily schedule)
-        now_time = current_dt.time()
-        now = datetime.datetime.combine(datetime.date.today(), now_time)
-
-        rows = self.table_widget.rowCount()
-        next_train_row = -1
-        min_diff = float('inf')
-        current_row = -1
-
-        # Color constants
-        COLOR_CURRENT = QColor("#90EE90")  # Light Green
-        COLOR_NEXT = QColor("#FFFFE0")  # Light Yellow
-
-        # Single pass: determine current and next rows without painting
-        for r in range(rows):
-            item_dep = self.table_widget.item(r, 3)
-            item_arr = self.table_widget.item(r, 6)
-
-            t_dep = self._parse_time(item_dep.text()) if item_dep else None
-            t_arr = self._parse_time(item_arr.text()) if item_arr else None
-
-            if not (t_dep and t_arr):
-                continue
-
-            actual_arr = t_arr + datetime.timedelta(days=1) if t_arr < t_dep else t_arr
-
-            if current_row == -1 and t_dep <= now <= actual_arr:
-                current_row = r
-                # Do not break; we still want to find the next upcoming train
-                continue
-
-            if t_dep > now:
-                diff = (t_dep - now).total_seconds()
-                if diff < min_diff:
-                    min_diff = diff
-                    next_train_row = r
-
-        # If nothing changed, skip repaint
-        if current_row == self.last_current_row and next_train_row == self.last_next_row:
-            return
-
-        # Clear old highlights (only the rows we touched previously)
-        for old_row in {self.last_current_row, self.last_next_row}:
-            if old_row != -1 and old_row not in (current_row, next_train_row):
-                self._apply_row_style(old_row, None, None)
-
-        # Apply new highlights
-        if current_row != -1:
-            self._apply_row_style(current_row, COLOR_CURRENT, Qt.black)
-        if next_train_row != -1 and next_train_row != current_row:
-            self._apply_row_style(next_train_row, COLOR_NEXT, Qt.black)
-
-        # Update cache
-        self.last_current_row = current_row
-        self.last_next_row = next_train_row
+        entry = self.redo_stack.pop()
+        self.undo_stack.append(self._apply_history(entry, reverse=False))
+
+    def _invalidate_time_cache(self, *args):
+        self._time_cache_timer.start()
+
+    def _on_time_cell_edited(self, row, col, old, new):
+        if col in (self.DEP_COL, self.ARR_COL):
+            self._time_cache_timer.start()
+
+    def _rebuild_time_cache(self):
+        """Parse departure and arrival of every row into seconds-of-day arrays for the worker."""
+        rows = self.model.rows
+        dep_col, arr_col = self.DEP_COL, self.ARR_COL
+        count = len(rows)
+
+        # Both time columns as one contiguous string array (width sized to the data);
+        # each distinct time string is parsed once and scattered back by index
+        texts = np.array([row_data[dep_col] for row_data in rows] + [row_data[arr_col] for row_data in rows],
+                         dtype=np.str_)
+        uniques, inverse = np.unique(texts, return_inverse=True)
+        unique_sec = np.full(len(uniques), -1, dtype=np.int32)
+        for i, text in enumerate(uniques.tolist()):
+            hms = _parse_hhmmss(text) if text else None
+            if hms:
+                unique_sec[i] = _to_sec(hms)
+        secs = unique_sec[inverse.ravel()]
+        dep, arr = secs[:count], secs[count:]
+
+        valid = (dep >= 0) & (arr >= 0)
+        dep_sec = np.where(valid, dep, -1).astype(np.int32)
+        arr_sec = np.where(valid, np.where(arr < dep, arr + 86400, arr), -1).astype(np.int32)
+
+        self.times_changed.emit(dep_sec, arr_sec)
+
+    def _stop_highlight_thread(self):
+        """Stop feeding ticks to the highlight worker and end its thread."""
+        if self._sim_widget is not None:
+            self._sim_widget.sim_time_updated.disconnect(self._highlight_worker.on_tick)
+            self._sim_widget = None
+        _finish_thread(self._highlight_thread)
+
+    def closeEvent(self, event):
+        self._stop_highlight_thread()
+        self._settings.sync()
+        super().closeEvent(event)